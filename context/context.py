@@ -16,9 +16,27 @@ Usage:
 import os
 import sys
 import re
-import argparse
-from pathlib import Path
-from typing import List, Optional
+import codecs
+import mmap
+from types import SimpleNamespace
+from typing import List, Optional, Tuple
+
+
+# Transcript structure patterns, compiled once at import time.
+# Universal PowerShell prompt (works in all languages): PS C:\path>
+# Matched at line starts only; [^>\n]* stops at the prompt's '>' without backtracking
+_PROMPT_RE = re.compile(r'^PS [A-Za-z]:\\[^>\n]*>', re.MULTILINE)
+# Error-only command after a prompt (e.g., Ctrl+C interruptions)
+_ERROR_RE = re.compile(r'\s*TerminatingError\(')
+# Separator lines consisting ONLY of asterisks (20+)
+_SEP_PREFIX = '*' * 20
+_SEP_RE = re.compile(r'^\*{20,}\r?$', re.MULTILINE)
+# Loose prompt check used to validate a decoded transcript
+_PS_RE = re.compile(r'PS\s+[A-Za-z]:')
+# Lines from previous context command outputs, including the line break
+_CC_RE = re.compile(r'^[^\S\n]*#c#[^\n]*\n?', re.MULTILINE)
+# Non-blank lines (see filter_self_referential)
+_CONTENT_LINE_RE = re.compile(r'^[^\S\n]*\S', re.MULTILINE)
 
 
 def find_transcript_file() -> Optional[str]:
@@ -39,14 +57,81 @@ def find_transcript_file() -> Optional[str]:
     if not os.path.exists(log_dir):
         return None
 
-    # Find all .txt files
-    transcript_files = list(Path(log_dir).glob("PowerShell_*.txt"))
+    # Return most recently modified transcript
+    # DirEntry.stat() reuses the metadata from the directory listing on Windows
+    newest_file = None
+    newest_mtime = -1.0
+    with os.scandir(log_dir) as entries:
+        for entry in entries:
+            name = entry.name
+            if not (name.startswith("PowerShell_") and name.endswith(".txt")):
+                continue
+            mtime = entry.stat().st_mtime
+            if mtime > newest_mtime:
+                newest_mtime = mtime
+                newest_file = entry.path
+
+    return newest_file
+
+
+def _split_blocks(text: str) -> List[str]:
+    """Split transcript text on separator lines."""
+    # PowerShell writes all separators with the same width, so a plain
+    # str.split on that exact line replaces the MULTILINE regex
+    first = _SEP_RE.search(text)
+    if first:
+        sentinel = '\n' + first.group()
+        blocks = text.split(sentinel)
+        if blocks[0].startswith(sentinel[1:]):
+            blocks[0:1] = ['', blocks[0][len(sentinel) - 1:]]
+
+        # Only valid if each match filled its whole line and every line
+        # starting with asterisks was matched
+        if (all(not block or block[0] == '\n' for block in blocks[1:])
+                and len(blocks) - 1 == text.count('\n' + _SEP_PREFIX) + text.startswith(_SEP_PREFIX)):
+            return blocks
+
+    return _SEP_RE.split(text)
+
 
-    if not transcript_files:
+def _scan_block(block: str) -> Optional[str]:
+    """
+    Return the cleaned block if it is a command block, otherwise None.
+
+    Lines from previous context command outputs (#c#) are dropped.
+    """
+    # Header blocks (transcript start/end text) never have PS prompts
+    if 'PS ' not in block:
+        return None
+
+    # Filter out lines from previous context command outputs
+    # This prevents nested #c# prefixes when context is invoked multiple times
+    if '#c#' in block:
+        block = _CC_RE.sub('', block)
+
+    # Skip error-only blocks (e.g., Ctrl+C interruptions)
+    # These blocks look like:
+    # PS C:\path> TerminatingError(): "Die Pipeline wurde beendet."
+    # >> TerminatingError(): "Die Pipeline wurde beendet."
+    prompt_match = _PROMPT_RE.search(block)
+    if not prompt_match or _ERROR_RE.match(block, prompt_match.end()):
         return None
 
-    # Return most recently modified file
-    return str(max(transcript_files, key=lambda p: p.stat().st_mtime))
+    return block.strip()
+
+
+def _normalize(text: str) -> str:
+    """Normalize line endings and strip BOM if present"""
+    # Each replace copies the whole text, so only run the passes that are needed
+    # (str.translate with a deletion table measured ~25x slower than replace)
+    if '\r' in text:
+        text = text.replace('\r\n', '\n')
+        if '\r' in text:
+            text = text.replace('\r', '\n')
+
+    # The BOM is normally skipped before decoding; also remove UTF-16 BOM
+    # (shows as \ufeff) and other potential BOM artifacts from text passed in
+    return text.lstrip('\x00\ufeff')
 
 
 def parse_transcript(text: str) -> List[str]:
@@ -68,63 +153,182 @@ def parse_transcript(text: str) -> List[str]:
     Returns list of command blocks (prompt + command + output).
     """
 
-    # Normalize line endings and strip BOM if present
-    text = text.replace('\r\n', '\n').replace('\r', '\n')
-
-    # Remove UTF-16 BOM if present (shows as \ufeff)
-    if text.startswith('\ufeff'):
-        text = text[1:]
+    text = _normalize(text)
+    command_blocks = []
 
-    # Also remove other potential BOM artifacts
-    text = text.lstrip('\x00\ufeff')
+    for block in _split_blocks(text):
+        block = _scan_block(block)
+        if block:
+            command_blocks.append(block)
 
-    # Filter out lines from previous context command outputs
-    # This prevents nested #c# prefixes when context is invoked multiple times
-    lines = text.split('\n')
-    lines = [line for line in lines if not line.lstrip().startswith('#c#')]
-    text = '\n'.join(lines)
+    return command_blocks
 
-    # Split on lines that are ONLY asterisks (20+)
-    # Using MULTILINE flag to match at start/end of lines
-    separator_pattern = r'^\*{20,}$'
-    blocks = re.split(separator_pattern, text, flags=re.MULTILINE)
 
-    # Universal PowerShell prompt pattern (works in all languages)
-    # Matches: PS C:\path> or PS /path> (PowerShell Core on Linux)
-    prompt_pattern = re.compile(r'^PS\s+[A-Za-z]:[^\n]*>\s*', re.MULTILINE)
+def parse_transcript_tail(text: str, max_blocks: int) -> List[str]:
+    """
+    Parse only the end of a transcript.
 
+    Walks backwards from the end of text between separators and stops after
+    max_blocks + 1 command blocks (one spare for filter_self_referential).
+    Returns the same trailing blocks as parse_transcript, in transcript order.
+    """
+    text = _normalize(text)
     command_blocks = []
 
-    for block in blocks:
-        block = block.strip()
+    block_end = len(text)
+    search_end = block_end
 
-        # Skip empty blocks
-        if not block:
-            continue
-
-        # Skip header blocks (contain transcript start/end text)
-        # These never have PS prompts in them
-        if not prompt_pattern.search(block):
-            continue
+    while len(command_blocks) <= max_blocks:
+        # Find the last line starting with asterisks before search_end
+        line_start = text.rfind('\n' + _SEP_PREFIX, 0, search_end) + 1
+        if line_start == 0 and not (search_end > 0 and text.startswith(_SEP_PREFIX)):
+            line_start = -1
 
-        # Skip error-only blocks (e.g., Ctrl+C interruptions)
-        # These blocks look like:
-        # PS C:\path> TerminatingError(): "Die Pipeline wurde beendet."
-        # >> TerminatingError(): "Die Pipeline wurde beendet."
-        # Extract the content after the PS prompt
-        prompt_match = prompt_pattern.search(block)
-        if prompt_match:
-            content_after_prompt = block[prompt_match.end():].strip()
-            # Check if this is just an error message, not a real command
-            if content_after_prompt.startswith('TerminatingError('):
+        if line_start < 0:
+            # Reached the start of the transcript
+            block_start = 0
+        else:
+            line_end = text.find('\n', line_start)
+            if line_end < 0:
+                line_end = len(text)
+            # Not a separator unless the line is ONLY asterisks
+            if text[line_start:line_end].strip('*'):
+                search_end = line_start
                 continue
+            block_start = line_end + 1
+
+        block = _scan_block(text[block_start:block_end])
+        if block:
+            command_blocks.append(block)
 
-        # This is a command block - keep it
-        command_blocks.append(block)
+        if line_start <= 0:
+            break
 
+        block_end = line_start
+        search_end = line_start
+
+    command_blocks.reverse()
     return command_blocks
 
 
+def _detect_encoding(head: bytes) -> Tuple[List[str], int]:
+    """
+    Pick the transcript encoding from its first 4 bytes.
+
+    Returns the encodings to try in order and the length of the BOM.
+    Windows PowerShell writes UTF-16-LE with a BOM, PowerShell 7 writes UTF-8.
+    """
+    if head.startswith(codecs.BOM_UTF8):
+        return ['utf-8'], len(codecs.BOM_UTF8)
+    if head.startswith(codecs.BOM_UTF16_LE):
+        return ['utf-16-le'], len(codecs.BOM_UTF16_LE)
+    if head.startswith(codecs.BOM_UTF16_BE):
+        return ['utf-16-be'], len(codecs.BOM_UTF16_BE)
+
+    # No BOM: ASCII text stored as UTF-16 has every other byte zero
+    if len(head) == 4 and head[1] == head[3] == 0:
+        return ['utf-16-le'], 0
+    if len(head) == 4 and head[0] == head[2] == 0:
+        return ['utf-16-be'], 0
+
+    return [
+        'utf-8',           # Most common on modern systems
+        'cp1252',          # Windows ANSI (Western European)
+        'latin-1',         # Fallback (never fails but may give garbage)
+    ], 0
+
+
+def _decode(data, encodings: List[str]) -> Tuple[str, str]:
+    """Decode data with the first encoding that works, returning (text, encoding)"""
+    # The built-in UTF-16 codec already has a fast path for ASCII/Latin-1 text;
+    # taking every other byte by hand (data[::2].decode('latin-1')) plus the
+    # check that all high bytes are zero measured about 3x slower
+    for encoding in encodings[:-1]:
+        try:
+            return str(data, encoding), encoding
+        except UnicodeDecodeError:
+            continue
+    try:
+        return str(data, encodings[-1]), encodings[-1]
+    except UnicodeDecodeError:
+        # The traceback keeps this frame alive; drop the buffer so the
+        # caller can still release the mapping
+        del data
+        raise
+
+
+def _find_aligned(data, sub: bytes, start: int, unit: int) -> int:
+    """find() that only accepts matches starting on a code unit boundary"""
+    index = data.find(sub, start)
+    while index >= 0 and index % unit:
+        index = data.find(sub, index + 1)
+    return index
+
+
+def _read_tail(data, view: memoryview, encodings: List[str], bom_len: int, n_blocks: int) -> Tuple[str, str]:
+    """
+    Decode only the end of a mapped transcript, enough to hold the last n_blocks command blocks.
+
+    data is searched, view (a memoryview of data) is sliced for decoding.
+
+    Separators and prompts are ASCII, so block boundaries are found in the
+    raw bytes by searching for the encoded markers, and only the bytes from
+    the first needed block onwards are decoded. Walks back until the tail
+    contains more than n_blocks command blocks (one spare for
+    filter_self_referential) or the start of the file is reached.
+
+    Returns (text, encoding used).
+    """
+    encoding = encodings[0]
+    newline = '\n'.encode(encoding)
+    unit = len(newline)
+    separator = ('\n' + _SEP_PREFIX).encode(encoding)
+    prompt = '\nPS '.encode(encoding)
+    error = 'TerminatingError('.encode(encoding)
+
+    candidates = 0
+    needed = n_blocks + 1
+    block_end = len(data)
+    search_end = len(data)
+
+    while True:
+        # Previous line starting with asterisks (whole code units only)
+        sep_start = data.rfind(separator, bom_len, search_end)
+        while sep_start >= 0 and sep_start % unit:
+            sep_start = data.rfind(separator, bom_len, sep_start + len(separator) - 1)
+
+        if sep_start < 0:
+            return _decode(view[bom_len:], encodings)
+
+        search_end = sep_start + len(separator) - 1
+        line_start = sep_start + unit
+        line_end = _find_aligned(data, newline, line_start, unit)
+        if line_end < 0:
+            line_end = len(data)
+
+        # Not a separator unless the line is ONLY asterisks
+        line = str(view[line_start:line_end], encoding, 'replace')
+        if line.rstrip('\r').strip('*'):
+            continue
+
+        # Blocks without a prompt (headers) or with an error-only prompt don't count
+        prompt_start = data.find(prompt, line_end, block_end)
+        if prompt_start >= 0:
+            prompt_end = data.find(newline, prompt_start + unit, block_end)
+            if prompt_end < 0:
+                prompt_end = block_end
+            if data.find(error, prompt_start, prompt_end) < 0:
+                candidates += 1
+        block_end = sep_start
+
+        if candidates >= needed:
+            text, encoding_used = _decode(view[line_start:], encodings)
+            # The byte-level count is only an estimate, so verify by parsing
+            if len(parse_transcript_tail(text, n_blocks)) > n_blocks:
+                return text, encoding_used
+            needed *= 2
+
+
 def filter_self_referential(blocks: List[str]) -> List[str]:
     """
     Remove the last block if it's just the current context command with no output.
@@ -133,14 +337,18 @@ def filter_self_referential(blocks: List[str]) -> List[str]:
         return blocks
 
     last_block = blocks[-1]
-    lines = [l.strip() for l in last_block.split('\n') if l.strip()]
 
-    # If last block is very short, it might just be the current prompt
-    if len(lines) <= 2:
-        # Check if it contains 'context' command
-        block_text = '\n'.join(lines).lower()
-        if 'context' in block_text:
-            return blocks[:-1]
+    # If last block is very short, it might just be the current prompt.
+    # Count non-blank lines without splitting (and stripping) every line.
+    non_blank_lines = 0
+    for _ in _CONTENT_LINE_RE.finditer(last_block):
+        non_blank_lines += 1
+        if non_blank_lines > 2:
+            return blocks
+
+    # Check if it contains 'context' command
+    if 'context' in last_block.lower():
+        return blocks[:-1]
 
     return blocks
 
@@ -150,44 +358,200 @@ def format_output(blocks: List[str]) -> str:
     if not blocks:
         return "#c# No commands found in transcript."
 
-    result = []
-    for block in blocks:
-        # Prefix each line of the block
-        for line in block.split('\n'):
-            result.append(f"#c# {line}")
-        result.append("#c# ")  # Blank line separator
+    # Prefix each line of the block, followed by a blank line separator
+    return '\n'.join(['#c# ' + block.replace('\n', '\n#c# ') + '\n#c# ' for block in blocks])
+
+
+def read_transcript(transcript_file: str, count: Optional[int] = None) -> Tuple[str, str]:
+    """
+    Read a transcript, detecting the encoding from its BOM.
+
+    With a count, only the end of the file holding the last count blocks
+    is decoded. Returns (text, encoding used).
+    """
+    with open(transcript_file, 'rb') as f:
+        encodings, bom_len = _detect_encoding(f.read(4))
+        # mmap cannot map an empty file
+        if os.fstat(f.fileno()).st_size == 0:
+            return '', encodings[0]
+
+        # Decoding straight from the mapping avoids holding a second copy of
+        # the raw bytes next to the decoded text. Every decode returns a new
+        # str, so the mapping can be closed as soon as reading is done.
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+            if count is None:
+                return _decode(view[bom_len:], encodings)
+
+            # Only the last few blocks are needed
+            return _read_tail(mm, view, encodings, bom_len, count)
+
+
+def _parse_blocks(text: str, count: Optional[int]) -> List[str]:
+    """Extract command blocks (only as many as needed when a count is given)"""
+    if count is None:
+        return parse_transcript(text)
+    return parse_transcript_tail(text, count)
+
+
+def _select_blocks(blocks: List[str], count: Optional[int]) -> List[str]:
+    """Filter self-referential context commands and keep the last count blocks"""
+    blocks = filter_self_referential(blocks)
+
+    if count is None:
+        return blocks
+    return blocks[-count:] if blocks else []
+
+
+def env_command(transcript_file: str) -> str:
+    """PowerShell environment variable syntax for the transcript file"""
+    return f"$env:TRANSCRIPT_LOG_FILE = '{transcript_file}'"
+
+
+def _set_clipboard_win32(text: str) -> bool:
+    """Put text on the Windows clipboard via the Win32 API (no clip.exe process)"""
+    import ctypes
+    from ctypes import wintypes
+
+    CF_UNICODETEXT = 13
+    GMEM_MOVEABLE = 0x0002
+
+    user32 = ctypes.WinDLL('user32')
+    kernel32 = ctypes.WinDLL('kernel32')
+
+    # Handles are pointer-sized, declare types so they aren't truncated to int
+    kernel32.GlobalAlloc.argtypes = [wintypes.UINT, ctypes.c_size_t]
+    kernel32.GlobalAlloc.restype = wintypes.HGLOBAL
+    kernel32.GlobalLock.argtypes = [wintypes.HGLOBAL]
+    kernel32.GlobalLock.restype = wintypes.LPVOID
+    kernel32.GlobalUnlock.argtypes = [wintypes.HGLOBAL]
+    kernel32.GlobalFree.argtypes = [wintypes.HGLOBAL]
+    kernel32.GlobalFree.restype = wintypes.HGLOBAL
+    user32.OpenClipboard.argtypes = [wintypes.HWND]
+    user32.SetClipboardData.argtypes = [wintypes.UINT, wintypes.HANDLE]
+    user32.SetClipboardData.restype = wintypes.HANDLE
+
+    data = text.encode('utf-16le') + b'\x00\x00'
+
+    if not user32.OpenClipboard(None):
+        return False
+    try:
+        user32.EmptyClipboard()
+
+        handle = kernel32.GlobalAlloc(GMEM_MOVEABLE, len(data))
+        if not handle:
+            return False
+        pointer = kernel32.GlobalLock(handle)
+        if not pointer:
+            kernel32.GlobalFree(handle)
+            return False
+        ctypes.memmove(pointer, data, len(data))
+        kernel32.GlobalUnlock(handle)
+
+        # On success the clipboard owns the memory
+        if not user32.SetClipboardData(CF_UNICODETEXT, handle):
+            kernel32.GlobalFree(handle)
+            return False
+        return True
+    finally:
+        user32.CloseClipboard()
+
+
+def copy_to_clipboard(text: str) -> bool:
+    """Copy text to the Windows clipboard, returns False if not possible"""
+    try:
+        if _set_clipboard_win32(text):
+            return True
+    except (ImportError, AttributeError, OSError, ValueError):
+        # Not on Windows (no WinDLL) - try clip below
+        pass
+
+    try:
+        import subprocess
+        subprocess.run(
+            ['clip'],
+            input=text.encode('utf-16le'),
+            check=True,
+            capture_output=True
+        )
+        return True
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        # clip not available - silently continue
+        return False
+
+
+def run(count: int = 1, show_all: bool = False, environment: bool = False) -> str:
+    """
+    Return the output of the context command, for use in-process.
+
+    Used by llm-tools-context to avoid starting a Python interpreter per call.
+    Raises RuntimeError if no transcript is found, ValueError for a count
+    below 1 and OSError/UnicodeError if the transcript cannot be read.
+    """
+    transcript_file = find_transcript_file()
+    if not transcript_file:
+        raise RuntimeError("No PowerShell transcript found. "
+                           "Make sure transcription is enabled in your PowerShell profile.")
+
+    if environment:
+        return env_command(transcript_file)
+
+    if show_all:
+        count = None
+    elif count < 1:
+        raise ValueError("count must be a positive number")
+
+    text, _ = read_transcript(transcript_file, count)
+    return format_output(_select_blocks(_parse_blocks(text, count), count))
 
-    return '\n'.join(result)
+
+HELP = """usage: context [-h] [-e] [-a] [--debug] [count]
+
+Extract command blocks from PowerShell transcript
+
+positional arguments:
+  count              Number of recent blocks to show or "all" for entire history (default: 1)
+
+options:
+  -h, --help         show this help message and exit
+  -e, --environment  Output TRANSCRIPT_LOG_FILE environment variable
+  -a, --all          Show entire history
+  --debug            Show debug information"""
+
+
+def parse_args(argv: List[str]) -> SimpleNamespace:
+    """Parse command line arguments (argparse is avoided to keep startup fast)"""
+    args = SimpleNamespace(count=1, environment=False, all=False, debug=False)
+    count_given = False
+    unrecognized = []
+
+    for arg in argv:
+        if arg in ('-h', '--help'):
+            print(HELP)
+            sys.exit(0)
+        elif arg in ('-e', '--environment'):
+            args.environment = True
+        elif arg in ('-a', '--all'):
+            args.all = True
+        elif arg == '--debug':
+            args.debug = True
+        elif count_given or (arg.startswith('-') and not arg[1:].isdigit()):
+            unrecognized.append(arg)
+        else:
+            # Negative numbers are accepted here and converted later
+            args.count = arg
+            count_given = True
+
+    if unrecognized:
+        print(HELP.split('\n')[0], file=sys.stderr)
+        print(f"context: error: unrecognized arguments: {' '.join(unrecognized)}", file=sys.stderr)
+        sys.exit(2)
+
+    return args
 
 
 def main():
     # Parse arguments
-    parser = argparse.ArgumentParser(
-        description='Extract command blocks from PowerShell transcript'
-    )
-    parser.add_argument(
-        'count',
-        nargs='?',
-        default=1,
-        help='Number of recent blocks to show or "all" for entire history (default: 1)'
-    )
-    parser.add_argument(
-        '-e', '--environment',
-        action='store_true',
-        help='Output TRANSCRIPT_LOG_FILE environment variable'
-    )
-    parser.add_argument(
-        '-a', '--all',
-        action='store_true',
-        help='Show entire history'
-    )
-    parser.add_argument(
-        '--debug',
-        action='store_true',
-        help='Show debug information'
-    )
-
-    args = parser.parse_args()
+    args = parse_args(sys.argv[1:])
 
     # Find transcript file
     transcript_file = find_transcript_file()
@@ -195,23 +559,12 @@ def main():
     # Handle -e/--environment flag
     if args.environment:
         if transcript_file:
-            # PowerShell environment variable syntax
-            env_cmd = f"$env:TRANSCRIPT_LOG_FILE = '{transcript_file}'"
+            env_cmd = env_command(transcript_file)
             print(env_cmd)
 
             # Try to copy to clipboard (Windows)
-            try:
-                import subprocess
-                subprocess.run(
-                    ['clip'],
-                    input=env_cmd.encode('utf-16le'),
-                    check=True,
-                    capture_output=True
-                )
+            if copy_to_clipboard(env_cmd):
                 print("# Command copied to clipboard", file=sys.stderr)
-            except (subprocess.CalledProcessError, FileNotFoundError):
-                # clip not available - silently continue
-                pass
         else:
             print("# No PowerShell transcript found", file=sys.stderr)
             sys.exit(1)
@@ -234,7 +587,7 @@ def main():
                 raise ValueError()
         except (ValueError, TypeError):
             print("Error: Please provide a positive number or 'all'", file=sys.stderr)
-            parser.print_help(sys.stderr)
+            print(HELP, file=sys.stderr)
             sys.exit(1)
 
     if not transcript_file:
@@ -242,69 +595,36 @@ def main():
         print("Make sure transcription is enabled in your PowerShell profile.", file=sys.stderr)
         sys.exit(1)
 
-    # Read transcript with proper encoding detection
-    # Try multiple encodings in order of likelihood
-    encodings_to_try = [
-        'utf-8',           # Most common on modern systems
-        'utf-16-le',       # PowerShell default on Windows
-        'utf-16-be',       # Alternate byte order
-        'cp1252',          # Windows ANSI (Western European)
-        'latin-1',         # Fallback (never fails but may give garbage)
-    ]
-
-    text = None
-    encoding_used = None
-
-    for encoding in encodings_to_try:
-        try:
-            with open(transcript_file, 'r', encoding=encoding) as f:
-                text = f.read()
-
-            # Verify the text makes sense (contains expected patterns)
-            # If it's the wrong encoding, we'll get garbage
-            if '****' in text or re.search(r'PS\s+[A-Za-z]:', text):
-                encoding_used = encoding
-                break
-            else:
-                # Text decoded but doesn't look like a PowerShell transcript
-                # Try next encoding
-                text = None
-                continue
-
-        except (UnicodeDecodeError, UnicodeError):
-            # This encoding didn't work, try next
-            continue
-        except Exception as e:
-            # Other error (file not found, permission denied, etc.)
-            print(f"Error reading transcript: {e}", file=sys.stderr)
-            sys.exit(1)
-
-    if text is None:
+    try:
+        text, encoding_used = read_transcript(transcript_file, count)
+    except (UnicodeDecodeError, UnicodeError):
         print(f"Error: Could not decode transcript with any known encoding", file=sys.stderr)
-        print(f"Tried: {', '.join(encodings_to_try)}", file=sys.stderr)
+        sys.exit(1)
+    except Exception as e:
+        # Other error (file not found, permission denied, etc.)
+        print(f"Error reading transcript: {e}", file=sys.stderr)
         sys.exit(1)
 
     # Debug mode: show raw transcript info
     if args.debug:
         print(f"# Transcript file: {transcript_file}", file=sys.stderr)
         print(f"# Encoding used: {encoding_used}", file=sys.stderr)
-        print(f"# File size: {len(text)} characters", file=sys.stderr)
+        print(f"# File size: {os.path.getsize(transcript_file)} bytes", file=sys.stderr)
+        print(f"# Characters read: {len(text)}", file=sys.stderr)
         print(f"# Contains **** separators: {'****' in text}", file=sys.stderr)
-        # Extract pattern to avoid f-string backslash restriction
-        ps_prompt_pattern = r'PS\s+[A-Za-z]:'
-        print(f"# Contains PS prompts: {bool(re.search(ps_prompt_pattern, text))}", file=sys.stderr)
+        print(f"# Contains PS prompts: {bool(_PS_RE.search(text))}", file=sys.stderr)
 
         # Show first few characters (to debug encoding issues)
         first_chars = repr(text[:100])
         print(f"# First 100 chars: {first_chars}", file=sys.stderr)
 
         # Count separator lines
-        separator_count = len(re.findall(r'^\*{20,}$', text, re.MULTILINE))
+        separator_count = len(_SEP_RE.findall(text))
         print(f"# Separator lines found: {separator_count}", file=sys.stderr)
         print("", file=sys.stderr)
 
     # Extract blocks
-    blocks = parse_transcript(text)
+    blocks = _parse_blocks(text, count)
 
     if args.debug:
         print(f"# Found {len(blocks)} command blocks", file=sys.stderr)
@@ -316,17 +636,8 @@ def main():
 
         print("", file=sys.stderr)
 
-    # Filter self-referential context commands
-    blocks = filter_self_referential(blocks)
-
-    # Get requested number of blocks
-    if count is None:
-        selected_blocks = blocks
-    else:
-        selected_blocks = blocks[-count:] if blocks else []
-
     # Display results
-    print(format_output(selected_blocks))
+    print(format_output(_select_blocks(blocks, count)))
 
 
 if __name__ == "__main__":
@@ -1,10 +1,40 @@
 import llm
+import importlib.util
 import subprocess
 import sys
 import os
 from pathlib import Path
 
 
+# context.py loaded as a module, cached across tool calls
+_context_module = None
+# Set when loading failed, so the import is only tried once per process
+_load_failed = False
+
+
+def _load_context_module(context_script: Path):
+    """Import context.py from its install location, or return None if that fails"""
+    global _context_module, _load_failed
+
+    if _context_module is None and not _load_failed:
+        try:
+            # Load by path instead of adding ~/.local/bin to sys.path, so no
+            # other module named "context" can shadow it (or be shadowed)
+            spec = importlib.util.spec_from_file_location("llm_tools_context_script", context_script)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+        except Exception:
+            module = None
+
+        # Older installs of context.py have no run(); use the subprocess then
+        if hasattr(module, "run"):
+            _context_module = module
+        else:
+            _load_failed = True
+
+    return _context_module
+
+
 def context(input: str) -> str:
     """
     Execute the context command to get PowerShell command history including outputs.
@@ -27,6 +57,8 @@ def context(input: str) -> str:
 
     # Call Python directly with context.py (bypasses .bat wrapper issue on Windows)
     args = [sys.executable, str(context_script)]
+    count = 1
+    show_all = False
 
     # Validate and sanitize input to prevent shell injection
     if input and input.strip():
@@ -35,11 +67,22 @@ def context(input: str) -> str:
         # Only allow "all", "-a", "--all", or positive integers
         if input_clean.lower() in ["all", "-a", "--all"]:
             args.append(input_clean.lower())
+            show_all = True
         elif input_clean.isdigit() and int(input_clean) > 0:
             args.append(input_clean)
+            count = int(input_clean)
         else:
             return f"Error: Invalid input '{input_clean}'. Must be 'all', '-a', '--all', or a positive integer."
 
+    # Run context.py in-process when possible: starting a Python interpreter
+    # per tool call costs far more than parsing the transcript
+    context_module = _load_context_module(context_script)
+    if context_module is not None:
+        try:
+            return context_module.run(count=count, show_all=show_all) + "\n"
+        except Exception as e:
+            return f"Error running context command: {e}"
+
     try:
         result = subprocess.run(args, capture_output=True, text=True, check=True)
         return result.stdout